@@ -0,0 +1,58 @@
+"""
+Compares replicating a one-field edit as a ``ChangeSet`` against shipping the
+whole pickled object.
+
+Run with ``python benchmarks/changesets.py``.
+"""
+from __future__ import absolute_import, division, print_function
+
+import pickle
+import timeit
+
+from attr import attrib, attrs
+
+from attrsbuilders import generate_builder
+
+NUM_APPLIES = 100000
+
+
+@generate_builder
+@attrs(frozen=True)
+class Record(object):
+    record_id = attrib()
+    name = attrib()
+    tags = attrib()
+    payload = attrib()
+    version = attrib()
+
+
+def main():
+    original = Record(record_id=17, name="some record",
+                      tags=tuple("tag{0}".format(i) for i in range(20)),
+                      payload=b"x" * 1024, version=1)
+
+    builder = Record.builder().initialize_from(original)
+    builder.version = 2
+    edited = builder.build()
+
+    full_payload = pickle.dumps(edited, pickle.HIGHEST_PROTOCOL)
+    changeset_payload = pickle.dumps(builder.export_changes(),
+                                     pickle.HIGHEST_PROTOCOL)
+    assert Record.apply_changes(
+        original, pickle.loads(changeset_payload)) == edited
+
+    full_seconds = timeit.timeit(lambda: pickle.loads(full_payload),
+                                 number=NUM_APPLIES)
+    changeset_seconds = timeit.timeit(
+        lambda: Record.apply_changes(original, pickle.loads(changeset_payload)),
+        number=NUM_APPLIES)
+
+    print("payload size: full object {0} bytes, change set {1} bytes".format(
+        len(full_payload), len(changeset_payload)))
+    print("apply throughput: full object {0:,.0f}/s, change set {1:,.0f}/s"
+          .format(NUM_APPLIES / full_seconds,
+                  NUM_APPLIES / changeset_seconds))
+
+
+if __name__ == "__main__":
+    main()
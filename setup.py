@@ -39,6 +39,7 @@ EXTRAS_REQUIRE = {
     "tests": [
         "coverage",
         "hypothesis",
+        "numpy",
         "pympler",
         "pytest",
         "six",
@@ -12,4 +12,9 @@ __email__ = "ryan.gabbard@gmail.com"
 __license__ = "MIT"
 __copyright__ = "Copyright (c) 2018 Ryan Gabbard"
 
-from attrsbuilders._builders import generate_builder
\ No newline at end of file
+from attrsbuilders._batches import (
+    BATCH_VALIDATOR_METADATA_KEY,
+    BatchValidationError,
+)
+from attrsbuilders._builders import generate_builder
+from attrsbuilders._changesets import ChangeSet
@@ -0,0 +1,46 @@
+from __future__ import absolute_import, division, print_function
+
+# Key under which a field's ``attr.ib`` metadata may hold a vectorized
+# validator for use by ``Builder.build_batch``.  The validator is called as
+# ``validator(attribute, column)`` once per batch and must return a sequence
+# (e.g. a NumPy boolean array) which is truthy for each valid row.
+BATCH_VALIDATOR_METADATA_KEY = "attrsbuilders_batch_validator"
+
+# the maximum number of offending rows per field listed in error messages
+_MAX_REPORTED_ROWS = 10
+
+
+class BatchValidationError(ValueError):
+    """
+    Raised by ``Builder.build_batch`` when a batch validator rejects some rows.
+
+    ``invalid_rows`` maps the public name of each failing field to the tuple
+    of indices of the rows it rejected.
+    """
+
+    def __init__(self, cls, invalid_rows):
+        self.invalid_rows = invalid_rows
+        descriptions = []
+        for attribute_public_name, row_indices in invalid_rows.items():
+            shown_indices = ", ".join(
+                str(row_index)
+                for row_index in row_indices[:_MAX_REPORTED_ROWS])
+            if len(row_indices) > _MAX_REPORTED_ROWS:
+                shown_indices += ", ... ({0} rows total)".format(
+                    len(row_indices))
+            descriptions.append("{0} at rows [{1}]".format(
+                attribute_public_name, shown_indices))
+        super(BatchValidationError, self).__init__(
+            "Batch validation failed for {0}: {1}".format(
+                cls.__qualname__, "; ".join(descriptions)))
+
+
+def _invalid_row_indices(mask):
+    """
+    Gets the indices of the falsy entries of a batch validator's result.
+    """
+    if hasattr(mask, "nonzero"):
+        # a NumPy array, so avoid iterating over it in Python
+        return tuple((mask == 0).nonzero()[0].tolist())
+    return tuple(row_index for (row_index, valid) in enumerate(mask)
+                 if not valid)
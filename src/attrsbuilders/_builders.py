@@ -2,8 +2,29 @@ from __future__ import absolute_import, division, print_function
 
 import hashlib
 import linecache
+import reprlib
 
-from attr import NOTHING
+from attr import NOTHING, Factory
+from attr.validators import get_disabled
+
+from attrsbuilders._batches import (
+    BATCH_VALIDATOR_METADATA_KEY,
+    BatchValidationError,
+    _invalid_row_indices,
+)
+from attrsbuilders._changesets import ChangeSet, _layout_hash
+from attrsbuilders._views import _StructuredArrayView, _to_python
+
+# Name of the builder attribute holding the field values copied by
+# ``initialize_from``.  Public field names never start with an underscore, so
+# this cannot clash with a field.
+_INITIAL_VALUES_ATTRIBUTE = "_attrsbuilders_initial_values"
+
+# Name of the field attrs uses to cache hashes of ``cache_hash=True`` classes
+_HASH_CACHE_FIELD = "_attrs_cached_hash"
+
+# Prefix of the file name attrs gives the code of the __init__ it generates
+_ATTRS_INIT_FILENAME_PREFIX = "<attrs generated init "
 
 # utility methods from https://github.com/isi-vista/vistautils/blob/master/vistautils/class_utils.py
 
@@ -23,24 +44,48 @@ def _fully_qualified_name(clazz):
     return module + "." + clazz.__qualname__
 
 
-def _fully_qualified_name_of_type(obj):
+def _has_changed(value, initial_value):
     """
-    Gets the fully-qualified name of the type of this object.
-    This is the package name, plus the module name, plus the class name (including parent
-    classes for nested classes), joined by `.`s.  For builtin types or module-less types,
-    the package and module portions are omitted.
-    This implementation is indebted to https://stackoverflow.com/a/13653312/413345
+    Checks whether a builder field no longer holds its initial value.
+    """
+    if value is initial_value:
+        return False
+    try:
+        return bool(value != initial_value)
+    except Exception:
+        # e.g. NumPy arrays, whose comparisons can't be used as a bool
+        return True
+
+
+class _BoundedRepr(reprlib.Repr):
+    """
+    A ``reprlib.Repr`` which also abbreviates ``bytes`` and ``bytearray``.
+
+    ``reprlib`` would otherwise render them with the full ``repr`` before
+    truncating, which is slow for large blobs.
     """
-    return _fully_qualified_name(obj.__class__)
+
+    def repr_bytes(self, x, level):
+        # repr_str only slices and concatenates, so it works for bytes too
+        return self.repr_str(x, level)
+
+    def repr_bytearray(self, x, level):
+        return self.repr_str(x, level)
 
 
 class _BuilderBuilder(object):
-    def __init__(self, cls):
+    def __init__(self, cls, repr_max_length=None, view_method_name='view',
+                 apply_changes_method_name='apply_changes'):
         self._cls = cls
+        self._repr_max_length = repr_max_length
         self._builder_name = 'Builder'
         self._build_method_name = 'build'
         self._builder_method_name = 'builder'
         self._from_method_name = 'initialize_from'
+        self._view_method_name = view_method_name
+        self._build_batch_method_name = 'build_batch'
+        self._export_changes_method_name = 'export_changes'
+        self._apply_changes_method_name = apply_changes_method_name
 
     def build(self):
         cls = self._cls
@@ -50,14 +95,41 @@ class _BuilderBuilder(object):
         if not builder_cls:
             builder_cls = type(cls)("Builder", (), {})
             builder_cls.__qualname__ = f"{cls.__qualname__}.{self._builder_name}"
+            builder_cls.__module__ = cls.__module__
             setattr(cls, self._builder_name, builder_cls)
 
         self._patch_builder(builder_cls)
         setattr(self._cls, self._builder_method_name,
                 self._add_method_dunders(self._make_builder_method()))
+        if self._view_method_name:
+            self._check_name_is_free(self._view_method_name,
+                                     "view_method_name")
+            setattr(self._cls, self._view_method_name,
+                    self._add_method_dunders(self._make_view_method()))
+        if self._from_method_name and self._apply_changes_method_name:
+            self._check_name_is_free(self._apply_changes_method_name,
+                                     "apply_changes_method_name")
+            setattr(self._cls, self._apply_changes_method_name,
+                    self._add_method_dunders(self._make_apply_changes_method()))
 
         return cls
 
+    def _check_name_is_free(self, name, generate_builder_parameter):
+        """
+        Raises a ``TypeError`` if the class already defines *name* or has a
+        field called *name*, rather than silently replacing it.
+        """
+        field_names = set()
+        for attribute in self._cls.__attrs_attrs__:
+            field_names.add(attribute.name)
+            field_names.add(attribute.name.lstrip("_"))
+        if name in self._cls.__dict__ or name in field_names:
+            raise TypeError(
+                "{0} already has an attribute named {1!r}; pass "
+                "{2}=<another name> to generate_builder, or "
+                "{2}=None to leave it out".format(
+                    self._cls.__qualname__, name, generate_builder_parameter))
+
     def _find_builder(self, outer_cls):
         if hasattr(outer_cls, self._builder_name):
             return getattr(outer_cls, self._builder_name)
@@ -69,11 +141,17 @@ class _BuilderBuilder(object):
                 self._add_method_dunders(self._make_init()))
         setattr(builder_cls, self._build_method_name,
                 self._add_method_dunders(self._make_build()))
+        if self._build_batch_method_name:
+            setattr(builder_cls, self._build_batch_method_name,
+                    self._add_method_dunders(self._make_build_batch()))
         setattr(builder_cls, '__repr__',
-                self._add_method_dunders(self._make_repr()))
+                self._add_method_dunders(self._make_repr(builder_cls)))
         if self._from_method_name:
             setattr(builder_cls, self._from_method_name,
                     self._add_method_dunders(self._make_from_method()))
+            if self._export_changes_method_name:
+                setattr(builder_cls, self._export_changes_method_name,
+                        self._add_method_dunders(self._make_export_changes()))
 
     def _make_init(self):
         # We cache the generated init methods for the same kinds of attributes.
@@ -89,6 +167,9 @@ class _BuilderBuilder(object):
                 # strip _ to match attrs constructor
                 lines.append("\tself.{attribute_public_name} = NOTHING"
                              .format(attribute_public_name=attribute.name.lstrip('_')))
+        if self._from_method_name:
+            lines.append("\tself.{initial_values} = None".format(
+                initial_values=_INITIAL_VALUES_ATTRIBUTE))
         # in case none of the attributes are initialized
         lines.append("\tpass")
 
@@ -128,6 +209,12 @@ class _BuilderBuilder(object):
                              .format(
                     attribute_public_name=attribute.name.lstrip("_"),
                     attribute_name=attribute.name))
+        # remember what we started from so export_changes can diff against it
+        lines.append("\tself.{initial_values} = ({values})".format(
+            initial_values=_INITIAL_VALUES_ATTRIBUTE,
+            values="".join("self.{0}, ".format(attribute.name.lstrip("_"))
+                           for attribute in self._cls.__attrs_attrs__
+                           if attribute.init)))
         lines.append("\treturn self")
 
         script = "\n".join(lines)
@@ -202,22 +289,352 @@ class _BuilderBuilder(object):
 
         return build
 
-    def _make_repr(outer_self):
-        def __repr__(self):
-            ret = [_fully_qualified_name_of_type(self), "("]
-            first = True
-            for attribute in outer_self._cls.__attrs_attrs__:
-                if attribute.init:
-                    if first:
-                        first = False
-                    else:
-                        ret.append(", ")
-                    attribute_public_name = attribute.name.lstrip("_")
-                    ret.extend((attribute_public_name, "=",
-                                repr(getattr(self, attribute_public_name))))
-            ret.append(")")
-            return "".join(ret)
-        return __repr__
+    def _make_batch_init(self):
+        """
+        Makes a constructor for ``build_batch`` which behaves like the attrs
+        ``__init__`` but does not run the validators of fields with a batch
+        validator.
+
+        The constructor is built from the public ``Attribute`` fields
+        (``default``, ``converter`` and ``validator``) and the documented
+        ``__attrs_pre_init__``/``__attrs_post_init__`` hooks.  Resetting the
+        hash cache of ``cache_hash=True`` classes relies on attrs internals,
+        so this needs checking whenever the supported attrs versions change.
+
+        If the class's ``__init__`` was not generated by attrs, the class
+        itself is returned, since there are no attrs validators to skip.
+        """
+        cls = self._cls
+        init_code = getattr(cls.__init__, "__code__", None)
+        if init_code is None or not init_code.co_filename.startswith(
+                _ATTRS_INIT_FILENAME_PREFIX):
+            return cls
+
+        sha1 = hashlib.sha1()
+        sha1.update(repr(cls.__qualname__).encode("utf-8"))
+        unique_filename = "<attrsbuilder generated batch init {0}>".format(sha1.hexdigest())
+
+        global_variables = {
+            "NOTHING": NOTHING,
+            "cls": cls,
+            "get_disabled": get_disabled,
+            "_setattr": object.__setattr__,
+        }
+
+        def default_expression(index, attribute):
+            if isinstance(attribute.default, Factory):
+                global_variables["factory_{0}".format(index)] = \
+                    attribute.default.factory
+                return "factory_{0}({1})".format(
+                    index, "self" if attribute.default.takes_self else "")
+            global_variables["default_{0}".format(index)] = attribute.default
+            return "default_{0}".format(index)
+
+        def converted_expression(index, attribute, expression):
+            if attribute.converter is None:
+                return expression
+            global_variables["converter_{0}".format(index)] = \
+                attribute.converter
+            return "converter_{0}({1})".format(index, expression)
+
+        parameters = []
+        lines = ["\tself = cls.__new__(cls)"]
+        if hasattr(cls, "__attrs_pre_init__"):
+            lines.append("\tself.__attrs_pre_init__()")
+        for index, attribute in enumerate(cls.__attrs_attrs__):
+            if attribute.init:
+                attribute_public_name = attribute.name.lstrip("_")
+                parameters.append("{0}=NOTHING".format(attribute_public_name))
+                lines.append("\tif {0} is NOTHING:".format(
+                    attribute_public_name))
+                if attribute.default is NOTHING:
+                    lines.append(
+                        "\t\traise TypeError({0})".format(repr(
+                            "{0}() missing required field '{1}'".format(
+                                cls.__qualname__, attribute_public_name))))
+                else:
+                    lines.append("\t\t{0} = {1}".format(
+                        attribute_public_name,
+                        default_expression(index, attribute)))
+                lines.append("\t_setattr(self, {0}, {1})".format(
+                    repr(attribute.name),
+                    converted_expression(index, attribute,
+                                         attribute_public_name)))
+            elif attribute.default is not NOTHING:
+                lines.append("\t_setattr(self, {0}, {1})".format(
+                    repr(attribute.name),
+                    converted_expression(
+                        index, attribute,
+                        default_expression(index, attribute))))
+
+        validator_lines = []
+        for index, attribute in enumerate(cls.__attrs_attrs__):
+            if (attribute.validator is not None
+                    and BATCH_VALIDATOR_METADATA_KEY not in attribute.metadata):
+                global_variables["validator_{0}".format(index)] = \
+                    attribute.validator
+                global_variables["attribute_{0}".format(index)] = attribute
+                validator_lines.append(
+                    "\t\tvalidator_{0}(self, attribute_{0}, self.{1})".format(
+                        index, attribute.name))
+        if validator_lines:
+            lines.append("\tif not get_disabled():")
+            lines.extend(validator_lines)
+
+        # attrs only exposes whether a class caches its hash through the code
+        # of its __init__, which resets the cache
+        if _HASH_CACHE_FIELD in init_code.co_consts:
+            lines.append("\t_setattr(self, {0}, None)".format(
+                repr(_HASH_CACHE_FIELD)))
+        if hasattr(cls, "__attrs_post_init__"):
+            lines.append("\tself.__attrs_post_init__()")
+        lines.append("\treturn self")
+
+        lines.insert(0, "def batch_init({0}):".format(", ".join(parameters)))
+        script = "\n".join(lines)
+
+        local_variables = {}
+        bytecode = compile(script, unique_filename, "exec")
+        eval(bytecode, global_variables, local_variables)
+
+        # In order of debuggers like PDB being able to step through the code,
+        # we add a fake linecache entry.
+        linecache.cache[unique_filename] = (
+            len(script),
+            None,
+            script.splitlines(True),
+            unique_filename,
+        )
+
+        return local_variables["batch_init"]
+
+    def _make_build_batch(self):
+        cls = self._cls
+        batch_init = self._make_batch_init()
+        init_attributes = [(attribute, attribute.name.lstrip("_"))
+                           for attribute in cls.__attrs_attrs__
+                           if attribute.init]
+
+        def build_batch(builder_self, columns):
+            """
+            Builds one instance per row of *columns*.
+
+            *columns* maps field public names to equal-length columns (lists,
+            NumPy arrays, ...); a NumPy structured array may be passed
+            directly, in which case columns matching no field are ignored.
+            Fields without a column take the value set on this builder, or
+            else their default.
+
+            Batch validators registered under ``BATCH_VALIDATOR_METADATA_KEY``
+            are run once over each column, raising ``BatchValidationError``
+            listing the offending rows.  The per-instance attrs validators of
+            those fields are then skipped while constructing the instances;
+            all other validators run as usual.  Classes with their own
+            ``__init__`` are constructed by calling it, as ``build`` does.
+            """
+            dtype_names = getattr(getattr(columns, "dtype", None), "names",
+                                  None)
+            if dtype_names is not None:
+                # structured arrays often carry columns we don't need
+                column_names = set(dtype_names)
+            else:
+                column_names = set(columns.keys())
+                unknown_names = column_names.difference(
+                    attribute_public_name
+                    for (_, attribute_public_name) in init_attributes)
+                if unknown_names:
+                    raise ValueError(
+                        "Columns {0} are not init fields of {1}".format(
+                            sorted(unknown_names), cls.__qualname__))
+
+            shared_kw_args = {}
+            batch_columns = []
+            num_rows = None
+            for attribute, attribute_public_name in init_attributes:
+                if attribute_public_name in column_names:
+                    column = columns[attribute_public_name]
+                    if num_rows is None:
+                        num_rows = len(column)
+                    elif len(column) != num_rows:
+                        raise ValueError(
+                            "Column {0} has {1} rows but expected {2}".format(
+                                attribute_public_name, len(column), num_rows))
+                    batch_columns.append(
+                        (attribute, attribute_public_name, column))
+                else:
+                    builder_att_val = getattr(builder_self,
+                                              attribute_public_name)
+                    if builder_att_val is not NOTHING:
+                        shared_kw_args[attribute_public_name] = builder_att_val
+            if num_rows is None:
+                raise ValueError(
+                    "None of the columns {0} are fields of {1}".format(
+                        sorted(column_names), cls.__qualname__))
+
+            invalid_rows = {}
+            batch_validated = set()
+            for attribute, attribute_public_name, column in batch_columns:
+                batch_validator = attribute.metadata.get(
+                    BATCH_VALIDATOR_METADATA_KEY)
+                if batch_validator is not None:
+                    mask = batch_validator(attribute, column)
+                    try:
+                        mask_length = len(mask)
+                    except TypeError:
+                        mask_length = None
+                    if mask_length != num_rows:
+                        raise ValueError(
+                            "Batch validator of {0} must return one value "
+                            "per row ({1}) but returned {2!r}".format(
+                                attribute_public_name, num_rows, mask))
+                    row_indices = _invalid_row_indices(mask)
+                    if row_indices:
+                        invalid_rows[attribute_public_name] = row_indices
+                    batch_validated.add(attribute.name)
+            if invalid_rows:
+                raise BatchValidationError(cls, invalid_rows)
+
+            # batch-validated fields which did not get a column still need
+            # their validators run on each instance
+            instance_validators = [] if get_disabled() else [
+                attribute for attribute in cls.__attrs_attrs__
+                if attribute.validator is not None
+                and BATCH_VALIDATOR_METADATA_KEY in attribute.metadata
+                and attribute.name not in batch_validated]
+
+            names_and_values = [
+                (attribute_public_name, _to_python(column))
+                for (_, attribute_public_name, column) in batch_columns]
+            instances = []
+            for row_index in range(num_rows):
+                kw_args = dict(shared_kw_args)
+                for attribute_public_name, values in names_and_values:
+                    kw_args[attribute_public_name] = values[row_index]
+                instance = batch_init(**kw_args)
+                for attribute in instance_validators:
+                    attribute.validator(instance, attribute,
+                                        getattr(instance, attribute.name))
+                instances.append(instance)
+            return instances
+
+        return build_batch
+
+    def _make_export_changes(self):
+        layout_hash = _layout_hash(self._cls)
+        indexed_public_names = [
+            (index, attribute.name.lstrip("_"))
+            for (index, attribute) in enumerate(self._cls.__attrs_attrs__)
+            if attribute.init]
+
+        def export_changes(builder_self):
+            """
+            Gets a ``ChangeSet`` of the fields changed on this builder since
+            ``initialize_from``, to be applied with ``apply_changes``.
+
+            A field counts as changed if its value is not equal to the one
+            it was initialized with (or, for values which cannot be compared
+            that way, such as NumPy arrays, is no longer the same object).
+
+            The builder shares its values with the source object, so a value
+            mutated in place (e.g. ``builder.tags.append(tag)``) still equals
+            the recorded one and is NOT exported.  Assign a new value instead
+            (``builder.tags = builder.tags + [tag]``).
+            """
+            initial_values = getattr(builder_self, _INITIAL_VALUES_ATTRIBUTE)
+            if initial_values is None:
+                raise ValueError(
+                    "Can only export changes from a builder created with "
+                    "initialize_from")
+            changes = []
+            for (index, attribute_public_name), initial_value in zip(
+                    indexed_public_names, initial_values):
+                value = getattr(builder_self, attribute_public_name)
+                if _has_changed(value, initial_value):
+                    changes.append((index, value))
+            return ChangeSet(layout_hash, tuple(changes))
+
+        return export_changes
+
+    def _make_apply_changes_method(self):
+        cls = self._cls
+        layout_hash = _layout_hash(cls)
+        names = [(attribute.name, attribute.name.lstrip("_"))
+                 for attribute in cls.__attrs_attrs__ if attribute.init]
+        public_names_by_index = {
+            index: attribute.name.lstrip("_")
+            for (index, attribute) in enumerate(cls.__attrs_attrs__)
+            if attribute.init}
+
+        def apply_changes(obj, changeset):
+            """
+            Returns a copy of *obj* with the changes in *changeset*, as
+            exported by ``Builder.export_changes``, applied.
+            """
+            changeset_layout_hash, changes = changeset
+            if changeset_layout_hash != layout_hash:
+                raise ValueError(
+                    "Change set does not match the attribute layout of "
+                    "{0}".format(cls.__qualname__))
+            kw_args = {attribute_public_name: getattr(obj, attribute_name)
+                       for (attribute_name, attribute_public_name) in names}
+            for index, value in changes:
+                try:
+                    kw_args[public_names_by_index[index]] = value
+                except KeyError:
+                    raise ValueError(
+                        "Change set refers to field index {0}, which is not "
+                        "an init field of {1}".format(index, cls.__qualname__))
+            return cls(**kw_args)
+
+        return apply_changes
+
+    def _make_repr(self, builder_cls):
+        sha1 = hashlib.sha1()
+        sha1.update(repr(self._cls.__qualname__).encode("utf-8"))
+        unique_filename = "<attrsbuilder generated repr {0}>".format(sha1.hexdigest())
+
+        if self._repr_max_length is None:
+            value_repr = repr
+        else:
+            # bound the size (and mostly the cost) of each field's repr, so
+            # logging a builder holding huge values stays cheap
+            value_reprlib = _BoundedRepr()
+            value_reprlib.maxstring = self._repr_max_length
+            value_reprlib.maxother = self._repr_max_length
+            value_reprlib.maxlong = self._repr_max_length
+            value_repr = value_reprlib.repr
+
+        lines = ["def __repr__(self):",
+                 "\tparts = []"]
+        for attribute in self._cls.__attrs_attrs__:
+            if attribute.init:
+                attribute_public_name = attribute.name.lstrip("_")
+                # fields which were never set are elided
+                lines.extend((
+                    "\tvalue = self.{0}".format(attribute_public_name),
+                    "\tif value is not NOTHING:",
+                    "\t\tparts.append({0} + value_repr(value))".format(
+                        repr(attribute_public_name + "="))))
+        lines.append("\treturn {0} + ', '.join(parts) + ')'".format(
+            repr(_fully_qualified_name(builder_cls) + "(")))
+
+        script = "\n".join(lines)
+
+        local_variables = {}
+        bytecode = compile(script, unique_filename, "exec")
+        eval(bytecode, {"NOTHING": NOTHING, "value_repr": value_repr},
+             local_variables)
+
+        # In order of debuggers like PDB being able to step through the code,
+        # we add a fake linecache entry.
+        linecache.cache[unique_filename] = (
+            len(script),
+            None,
+            script.splitlines(True),
+            unique_filename,
+        )
+
+        return local_variables["__repr__"]
 
     def _make_builder_method(self):
         # We cache the generated init methods for the same kinds of attributes.
@@ -247,6 +664,25 @@ class _BuilderBuilder(object):
 
         return builder
 
+    def _make_view_method(self):
+        cls = self._cls
+
+        def view(structured_array, cache_size=0):
+            """
+            Returns a lazy sequence of instances of this class backed by
+            *structured_array*, a NumPy structured array (which may be a
+            ``np.memmap``).
+
+            Fields are mapped to array columns by their public name.  Fields
+            with no matching column take their default value.  Instances are
+            only built when indexed or iterated over; if *cache_size* is
+            positive, that many of the most recently built instances are
+            cached.
+            """
+            return _StructuredArrayView(cls, structured_array, cache_size)
+
+        return view
+
     def _add_method_dunders(self, method):
         """
         Add __module__ and __qualname__ to a *method* if possible.
@@ -269,10 +705,29 @@ class _BuilderBuilder(object):
 
 
 def generate_builder(
-        maybe_cls=None
+        maybe_cls=None,
+        repr_max_length=None,
+        view_method_name='view',
+        apply_changes_method_name='apply_changes'
 ):
+    """
+    Adds a builder to an attrs class.
+
+    If *repr_max_length* is given, the builder's ``__repr__`` abbreviates
+    field values ``reprlib``-style: strings and other values are cut to
+    about that many characters and long containers are elided.  This bounds
+    the cost of the repr only for strings, bytes, numbers and builtin
+    containers of them; other objects are still fully repr'd before being
+    cut down.
+
+    *view_method_name* and *apply_changes_method_name* are the names under
+    which the structured array view and the change set applier are added to
+    the class, or ``None`` to not add them.
+    """
     def wrap(cls):
-        builder_builder = _BuilderBuilder(cls)
+        builder_builder = _BuilderBuilder(cls, repr_max_length,
+                                          view_method_name,
+                                          apply_changes_method_name)
         if getattr(cls, "__class__", None) is None:
             raise TypeError("attrsbuilder only works with new-style classes.")
 
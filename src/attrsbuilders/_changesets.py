@@ -0,0 +1,30 @@
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+from collections import namedtuple
+
+# the number of bytes of the layout hash kept in a ``ChangeSet``
+_LAYOUT_HASH_LENGTH = 8
+
+ChangeSet = namedtuple("ChangeSet", ["layout_hash", "changes"])
+ChangeSet.__doc__ = """
+The fields changed on a builder since ``initialize_from``.
+
+``changes`` is a tuple of ``(index, value)`` pairs, where ``index`` is the
+position of the field in ``__attrs_attrs__``.  ``layout_hash`` identifies the
+layout of ``__attrs_attrs__`` so that a change set is never applied to an
+incompatible version of the class.
+
+Values mutated in place on the builder are not recorded; see
+``Builder.export_changes``.
+"""
+
+
+def _layout_hash(cls):
+    """
+    Gets a short hash identifying the names and order of a class's attributes.
+    """
+    sha1 = hashlib.sha1()
+    sha1.update(repr([(attribute.name, attribute.init)
+                      for attribute in cls.__attrs_attrs__]).encode("utf-8"))
+    return sha1.digest()[:_LAYOUT_HASH_LENGTH]
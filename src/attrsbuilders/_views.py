@@ -0,0 +1,114 @@
+from __future__ import absolute_import, division, print_function
+
+import operator
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from attr import NOTHING
+
+
+def _to_python(value):
+    """
+    Converts a NumPy scalar or sub-array to the equivalent Python object.
+
+    Values without a ``tolist`` method are returned unchanged.
+    """
+    to_list = getattr(value, "tolist", None)
+    if to_list is None:
+        return value
+    return to_list()
+
+
+class _StructuredArrayView(Sequence):
+    """
+    A lazy, read-only sequence of attrs instances backed by a structured array.
+
+    Each field of the attrs class is read from the array column with the same
+    public name.  Instances are only built when an element is indexed or
+    iterated over; up to *cache_size* of the most recently built instances
+    are kept around so that repeated lookups of the same row are cheap.
+    """
+
+    def __init__(self, cls, structured_array, cache_size=0):
+        dtype_names = getattr(getattr(structured_array, "dtype", None),
+                              "names", None)
+        if dtype_names is None:
+            raise TypeError(
+                "Can only view structured arrays but got {0!r}".format(
+                    structured_array))
+        if structured_array.ndim != 1:
+            raise ValueError(
+                "Can only view one-dimensional arrays but got one with {0} "
+                "dimensions".format(structured_array.ndim))
+        if cache_size < 0:
+            raise ValueError(
+                "cache_size must be non-negative but got {0}".format(
+                    cache_size))
+
+        column_names = []
+        for attribute in cls.__attrs_attrs__:
+            if attribute.init:
+                attribute_public_name = attribute.name.lstrip("_")
+                if attribute_public_name in dtype_names:
+                    column_names.append(attribute_public_name)
+                elif attribute.default is NOTHING:
+                    raise ValueError(
+                        "Structured array has no column for mandatory field "
+                        "{0} of {1}".format(attribute_public_name,
+                                            cls.__qualname__))
+
+        self._cls = cls
+        self._array = structured_array
+        self._column_names = tuple(column_names)
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # slicing a NumPy array (including a memmap) returns a view, so
+            # this does not copy the underlying data
+            return _StructuredArrayView(self._cls, self._array[index],
+                                        self._cache_size)
+
+        try:
+            index = operator.index(index)
+        except TypeError:
+            raise TypeError(
+                "view indices must be integers or slices, not {0}".format(
+                    type(index).__name__))
+
+        length = len(self._array)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("view index out of range")
+
+        if not self._cache_size:
+            return self._materialize(index)
+
+        cache = self._cache
+        try:
+            instance = cache[index]
+        except KeyError:
+            instance = self._materialize(index)
+            cache[index] = instance
+            if len(cache) > self._cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(index)
+        return instance
+
+    def __iter__(self):
+        for index in range(len(self._array)):
+            yield self[index]
+
+    def __repr__(self):
+        return "{0}.view(<{1} rows>)".format(self._cls.__qualname__, len(self))
+
+    def _materialize(self, index):
+        row = self._array[index]
+        return self._cls(**{column_name: _to_python(row[column_name])
+                            for column_name in self._column_names})
@@ -1,7 +1,13 @@
 import pytest
 
-from attr import attrs, attrib
-from attrsbuilders import generate_builder
+from attr import Factory, attrs, attrib
+from attr.validators import instance_of
+from attrsbuilders import (
+    BATCH_VALIDATOR_METADATA_KEY,
+    BatchValidationError,
+    generate_builder,
+)
+from attrsbuilders._builders import _BoundedRepr
 
 
 class TestMinimalUsageWithLocalClass(object):
@@ -15,6 +21,16 @@ class TestMinimalUsageWithLocalClass(object):
         assert A() == builder.build()
 
 
+class TestNoGeneratedInit(object):
+    def test_build(self):
+        @generate_builder
+        @attrs(init=False)
+        class A:
+            x = attrib(default=1)
+
+        assert isinstance(A.builder().build(), A)
+
+
 class TestDirectSetOfFields(object):
     def test_build(self):
         @generate_builder
@@ -55,3 +71,376 @@ class TestInitializeFromExistingNonPublic(object):
         builder = A.builder().initialize_from(original)
         builder.y = -2
         assert A(x=5, y=-2) == builder.build()
+
+
+class TestStructuredArrayView(object):
+    def test_view(self):
+        np = pytest.importorskip("numpy")
+
+        @generate_builder
+        @attrs
+        class A:
+            _x = attrib()
+            y = attrib(default="default")
+
+        array = np.array([(1, 2.5), (3, 4.5), (5, 6.5)],
+                         dtype=[("x", "i8"), ("z", "f8")])
+        view = A.view(array, cache_size=2)
+        assert len(view) == 3
+        assert view[0] == A(x=1)
+        assert view[-1] == A(x=5)
+        assert view[1] is view[1]
+        assert list(view[1:]) == [A(x=3), A(x=5)]
+        assert list(view) == [A(x=1), A(x=3), A(x=5)]
+        with pytest.raises(IndexError):
+            view[3]
+
+    def test_rejects_bad_indices(self):
+        np = pytest.importorskip("numpy")
+
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib()
+
+        view = A.view(np.array([(1,), (2,)], dtype=[("x", "i8")]))
+        assert view[np.int64(1)] == A(x=2)
+        with pytest.raises(TypeError):
+            view["x"]
+        with pytest.raises(TypeError):
+            view[np.array([True, False])]
+        with pytest.raises(ValueError):
+            A.view(np.zeros((), dtype=[("x", "i8")]))
+        with pytest.raises(ValueError):
+            A.view(np.zeros((2, 2), dtype=[("x", "i8")]))
+
+    def test_name_collision(self):
+        with pytest.raises(TypeError):
+            @generate_builder
+            @attrs(slots=True)
+            class A:
+                view = attrib()
+
+        @generate_builder(view_method_name=None)
+        @attrs(slots=True)
+        class B:
+            view = attrib()
+
+        assert B(view=1).view == 1
+
+        @generate_builder(view_method_name="as_view")
+        @attrs
+        class C:
+            x = attrib()
+
+            def view(self):
+                return "mine"
+
+        assert C(x=1).view() == "mine"
+        assert hasattr(C, "as_view")
+
+    def test_missing_mandatory_column(self):
+        np = pytest.importorskip("numpy")
+
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib()
+            y = attrib()
+
+        array = np.zeros(3, dtype=[("x", "i8")])
+        with pytest.raises(ValueError):
+            A.view(array)
+
+
+def _non_negative(attribute, column):
+    return [value >= 0 for value in column]
+
+
+class TestBuildBatch(object):
+    def test_build_batch(self):
+        @generate_builder
+        @attrs
+        class A:
+            _x = attrib(metadata={BATCH_VALIDATOR_METADATA_KEY: _non_negative})
+            y = attrib(validator=instance_of(str))
+            z = attrib(default=0)
+
+        builder = A.builder()
+        builder.y = "shared"
+        assert builder.build_batch({"x": [1, 2]}) == [
+            A(x=1, y="shared"), A(x=2, y="shared")]
+
+    def test_reports_invalid_rows(self):
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib(metadata={BATCH_VALIDATOR_METADATA_KEY: _non_negative})
+            y = attrib(metadata={BATCH_VALIDATOR_METADATA_KEY: _non_negative})
+
+        with pytest.raises(BatchValidationError) as exc_info:
+            A.builder().build_batch({"x": [1, -1, -2], "y": [0, 1, -3]})
+        assert exc_info.value.invalid_rows == {"x": (1, 2), "y": (2,)}
+
+    def test_uses_custom_init(self):
+        @generate_builder
+        @attrs(init=False)
+        class A:
+            x = attrib(metadata={BATCH_VALIDATOR_METADATA_KEY: _non_negative})
+
+            def __init__(self, x):
+                self.x = x * 10
+
+        assert A.builder().build_batch({"x": [1]}) == [A(x=1)]
+        assert A(x=1).x == 10
+
+    def test_rejects_unknown_columns(self):
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib()
+            y = attrib(default=0)
+
+        with pytest.raises(ValueError):
+            A.builder().build_batch({"x": [1, 2], "yy": [5, 6]})
+
+    def test_rejects_mask_of_wrong_length(self):
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib(metadata={BATCH_VALIDATOR_METADATA_KEY:
+                                 lambda attribute, column: [True]})
+
+        with pytest.raises(ValueError):
+            A.builder().build_batch({"x": [1, -5, -6]})
+
+    def test_rejects_scalar_mask(self):
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib(metadata={BATCH_VALIDATOR_METADATA_KEY:
+                                 lambda attribute, column: True})
+
+        with pytest.raises(ValueError):
+            A.builder().build_batch({"x": [1, 2]})
+
+    def test_skips_only_batch_validated_fields(self):
+        calls = []
+
+        def record(instance, attribute, value):
+            calls.append(attribute.name)
+
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib(validator=record,
+                       metadata={BATCH_VALIDATOR_METADATA_KEY: _non_negative})
+            y = attrib(validator=instance_of(int))
+
+        with pytest.raises(TypeError):
+            A.builder().build_batch({"x": [1], "y": ["not an int"]})
+        A.builder().build_batch({"x": [1, 2], "y": [3, 4]})
+        assert calls == []
+        # validators are re-enabled afterwards
+        A(x=1, y=2)
+        assert calls == ["x"]
+
+    def test_leaves_other_classes_validators_alone(self):
+        @attrs
+        class Other:
+            v = attrib(validator=instance_of(int))
+
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib(metadata={BATCH_VALIDATOR_METADATA_KEY: _non_negative})
+            other = attrib(converter=lambda v: Other(v=v))
+
+        with pytest.raises(TypeError):
+            A.builder().build_batch({"x": [1], "other": ["not an int"]})
+
+    def test_matches_attrs_init(self):
+        @generate_builder
+        @attrs(frozen=True, slots=True, cache_hash=True, hash=True)
+        class A:
+            x = attrib(converter=int,
+                       metadata={BATCH_VALIDATOR_METADATA_KEY: _non_negative})
+            y = attrib(default=Factory(lambda self: self.x + 1,
+                                       takes_self=True))
+            z = attrib(init=False, default=Factory(tuple))
+
+        built = A.builder().build_batch({"x": [1.0, 2.0]})
+        assert built == [A(x=1), A(x=2)]
+        assert hash(built[0]) == hash(A(x=1))
+        with pytest.raises(TypeError):
+            A.builder().build_batch({"y": [1]})
+
+    def test_numpy_columns(self):
+        np = pytest.importorskip("numpy")
+
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib(validator=instance_of(int),
+                       metadata={BATCH_VALIDATOR_METADATA_KEY:
+                                 lambda attribute, column: column < 10})
+
+        array = np.array([(1,), (20,), (3,)], dtype=[("x", "i8")])
+        with pytest.raises(BatchValidationError) as exc_info:
+            A.builder().build_batch(array)
+        assert exc_info.value.invalid_rows == {"x": (1,)}
+        assert A.builder().build_batch(array[::2]) == [A(x=1), A(x=3)]
+
+
+class TestChangeSets(object):
+    def test_round_trip(self):
+        @generate_builder
+        @attrs
+        class A:
+            _x = attrib()
+            z = attrib(init=False, default=0)
+            y = attrib()
+
+        original = A(x=5, y=[1, 2])
+        builder = A.builder().initialize_from(original)
+        assert builder.export_changes().changes == ()
+        builder.y = -2
+        changeset = builder.export_changes()
+        assert changeset.changes == ((2, -2),)
+        assert A.apply_changes(original, changeset) == A(x=5, y=-2)
+
+    def test_name_collision(self):
+        with pytest.raises(TypeError):
+            @generate_builder
+            @attrs(slots=True)
+            class A:
+                apply_changes = attrib()
+
+        @generate_builder(apply_changes_method_name=None)
+        @attrs(slots=True)
+        class B:
+            apply_changes = attrib()
+
+        assert B(apply_changes=1).apply_changes == 1
+
+    def test_equal_replacement_is_not_a_change(self):
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib()
+
+        builder = A.builder().initialize_from(A(x=[1, 2]))
+        builder.x = [1, 2]
+        assert builder.export_changes().changes == ()
+
+    def test_in_place_mutation_is_not_exported(self):
+        @generate_builder
+        @attrs
+        class A:
+            tags = attrib()
+
+        builder = A.builder().initialize_from(A(tags=["a"]))
+        # the builder shares the list with the source object, so mutating
+        # it in place cannot be detected...
+        builder.tags.append("b")
+        assert builder.export_changes().changes == ()
+        # ...but assigning a new value is
+        builder.tags = builder.tags + ["c"]
+        assert builder.export_changes().changes == ((0, ["a", "b", "c"]),)
+
+    def test_uncomparable_values(self):
+        np = pytest.importorskip("numpy")
+
+        @generate_builder
+        @attrs(eq=False)
+        class A:
+            x = attrib()
+
+        builder = A.builder().initialize_from(A(x=np.arange(3)))
+        assert builder.export_changes().changes == ()
+        builder.x = np.arange(3)
+        assert len(builder.export_changes().changes) == 1
+
+    def test_requires_initialize_from(self):
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib()
+
+        with pytest.raises(ValueError):
+            A.builder().export_changes()
+
+    def test_rejects_other_layout(self):
+        @generate_builder
+        @attrs
+        class A:
+            x = attrib()
+
+        @generate_builder
+        @attrs
+        class B:
+            y = attrib()
+
+        builder = B.builder().initialize_from(B(y=1))
+        builder.y = 2
+        with pytest.raises(ValueError):
+            A.apply_changes(A(x=1), builder.export_changes())
+
+
+class TestBuilderRepr(object):
+    def test_repr_elides_unset_fields(self):
+        @generate_builder
+        @attrs
+        class A:
+            _x = attrib()
+            y = attrib()
+
+        builder = A.builder()
+        builder.y = "foo"
+        assert repr(builder).endswith("A.Builder(y='foo')")
+
+    def test_repr_max_length(self):
+        @generate_builder(repr_max_length=10)
+        @attrs
+        class A:
+            x = attrib()
+            y = attrib()
+
+        builder = A.builder()
+        builder.x = "a" * 1000
+        builder.y = list(range(1000))
+        assert repr(builder).endswith(
+            "A.Builder(x='aa...aaa', y=[0, 1, 2, 3, 4, 5, ...])")
+
+    def test_repr_max_length_abbreviates_ints(self):
+        @generate_builder(repr_max_length=5)
+        @attrs
+        class A:
+            x = attrib()
+
+        builder = A.builder()
+        builder.x = 123456789012345
+        assert repr(builder).endswith("A.Builder(x=1...5)")
+
+    def test_repr_max_length_slices_bytes(self, monkeypatch):
+        sliced_types = []
+        repr_str = _BoundedRepr.repr_str
+
+        def recording_repr_str(self, x, level):
+            sliced_types.append(type(x))
+            return repr_str(self, x, level)
+
+        monkeypatch.setattr(_BoundedRepr, "repr_str", recording_repr_str)
+
+        @generate_builder(repr_max_length=10)
+        @attrs
+        class A:
+            x = attrib()
+            y = attrib()
+
+        builder = A.builder()
+        builder.x = b"a" * 1000000
+        builder.y = bytearray(b"b" * 1000000)
+        assert repr(builder).endswith(
+            "A.Builder(x=b'a...aaa', y=byt...bb'))")
+        assert sliced_types == [bytes, bytearray]